@@ -0,0 +1,20 @@
+import pandas as pd
+
+from wbe_odm import odm
+
+
+def test_polygon_geojson_with_missing_pop():
+    data = odm.Odm()
+    data.polygon = pd.DataFrame({
+        "polygonID": ["a", "b"],
+        "name": ["A", "B"],
+        "type": ["swrcat", "swrcat"],
+        "pop": pd.array([1000, None], dtype="Int64"),
+        "wkt": [
+            "POLYGON ((0 0, 1 0, 1 1, 0 0))",
+            "POLYGON ((0 0, 2 0, 2 2, 0 0))",
+        ],
+    })
+    geo = data.get_polygon_geoJSON()
+    pops = [feature["properties"]["pop"] for feature in geo["features"]]
+    assert pops == [1000, "null"]
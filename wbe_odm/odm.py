@@ -1,11 +1,13 @@
+import base64
 import json
 import os
 import sqlite3
+import warnings
 from wbe_odm.odm_mappers import base_mapper
 
 import numpy as np
 import pandas as pd
-import requests
+import pyarrow as pa
 from shapely.geometry import Point
 
 from wbe_odm import utilities
@@ -96,7 +98,7 @@ class Odm:
             pd.DataFrame: The merged table with dupicate rows dropped
         """
         primary_key = utilities.get_primary_key(table_name)
-        df = df1.append(df2)
+        df = pd.concat([df1, df2], ignore_index=True, sort=False)
         df = df.drop_duplicates(subset=[primary_key])
         return df
 
@@ -181,23 +183,22 @@ class Odm:
             ].copy()
         for col in polygon_df.columns:
             is_cat = polygon_df[col].dtype.name == "category"
+            # Nullable dtypes such as Int64 reject "null" as a fill value
             polygon_df[col] = polygon_df[col] if is_cat \
-                else polygon_df[col].fillna("null")
-        for i, row in polygon_df.iterrows():
-            if row["wkt"] != "":
-                new_feature = {
-                    "type": "Feature",
-                    "geometry": utilities.convert_wkt_to_geojson(
-                        row["wkt"]
-                    ),
-                    "properties": {
-                        col:
-                        row[col] for col in polygon_df.columns
-                            if "wkt" not in col
-                    },
-                    "id": i
-                }
-                geo["features"].append(new_feature)
+                else polygon_df[col].astype(object).fillna("null")
+        polygon_df = polygon_df.loc[polygon_df["wkt"] != ""]
+        prop_cols = [col for col in polygon_df.columns if "wkt" not in col]
+        props = polygon_df[prop_cols].to_dict(orient="records")
+        geo["features"] = [
+            {
+                "type": "Feature",
+                "geometry": utilities.convert_wkt_to_geojson(wkt),
+                "properties": prop,
+                "id": i
+            }
+            for i, wkt, prop in zip(
+                polygon_df.index, polygon_df["wkt"], props)
+        ]
         return geo
 
     def to_sqlite3(self,
@@ -230,21 +231,21 @@ class Odm:
             df = getattr(self, attr)
             if df.empty:
                 continue
-            df.to_sql(
-                name='myTempTable',
-                con=con,
-                if_exists='replace',
-                index=False
-            )
-            cols = df.columns
-            cols_str = f"{tuple(cols)}".replace("'", "\"")
-
-            sql = f"""REPLACE INTO {odm_name} {cols_str}
-                    SELECT * from myTempTable """
-
-            con.execute(sql)
-            con.execute("drop table if exists myTempTable")
-            con.close()
+            cols_str = ", ".join(f'"{col}"' for col in df.columns)
+            placeholders = ", ".join("?" * len(df.columns))
+            sql = f"""REPLACE INTO {odm_name} ({cols_str})
+                    VALUES ({placeholders})"""
+
+            # sqlite3 only binds python scalars, and missing values
+            # must be stored as NULL.
+            records = df.astype(object)
+            for col in df.select_dtypes("datetime").columns:
+                records[col] = df[col].dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+            records = records.where(df.notna(), None)
+            with con:
+                con.executemany(
+                    sql, records.itertuples(index=False, name=None))
+        con.close()
         return
 
     def to_csv(self,
@@ -302,7 +303,28 @@ class Odm:
         return
 
     def add_to_attr(self, attribute, other_value):
-        raise NotImplementedError()
+        """Adds the rows of a table to the matching attribute,
+        dropping the rows that were already there.
+
+        Parameters
+        ----------
+        attribute : str
+            Name of the attribute (table) to extend
+        other_value : pd.DataFrame
+            The rows to add
+        """
+        if other_value is None or other_value.empty:
+            return
+        current_value = getattr(self, attribute)
+        if current_value is None or current_value.empty:
+            setattr(self, attribute, other_value)
+            return
+        combined_df = pd.concat(
+            [current_value, other_value],
+            ignore_index=True,
+            sort=False
+        ).drop_duplicates()
+        setattr(self, attribute, combined_df)
 
     def combine_dataset(self) -> pd.DataFrame:
         """Creates a Wide table out the data contained in the Odm object.
@@ -353,14 +375,19 @@ class TableWidener:
         if df.empty:
             return df
         for qualifier in qualifiers:
-            filt1 = df[qualifier].isna()
-            filt2 = df[qualifier] == ""
-            df.loc[filt1 | filt2, qualifier] = f"unknown-{qualifier}"
-            df[qualifier] = df[qualifier].str.replace("/", "").str.lower()
+            # Qualifiers only take a handful of distinct values, so the
+            # string cleanup runs on those and is then broadcast back.
+            # Missing values get code -1, i.e. the last slot.
+            codes, uniques = pd.factorize(df[qualifier])
+            values = pd.Series(
+                np.append(np.asarray(uniques, dtype=object), ""))
+            values = values.replace("", f"unknown-{qualifier}")
+            values = values.str.replace("/", "", regex=False).str.lower()
             if qualifier == "qualityFlag":
-                df[qualifier] = df[qualifier].str\
+                values = values.str\
                     .replace("True", "quality-issue")\
                     .replace("False", "no-quality-issue")
+            df[qualifier] = values.to_numpy()[codes]
         return df
 
     def widen(self, agg="mean"):
@@ -375,25 +402,33 @@ class TableWidener:
             and the features spread out over new columns named after the values
             of the qualifier columns.
         """
-        df = self.raw_df.copy()
-        if df.empty:
+        if self.raw_df.empty:
             return
         df = self.clean_qualifier_columns()
         for qualifier in self.qualifiers:
             df[qualifier] = df[qualifier].astype(str)
             df[qualifier] = df[qualifier].str.replace(
                 "single", f"single-to-{agg}")
-        df["col_qualifiers"] = df[self.qualifiers].agg("_".join, axis=1)
-        unique_col_qualifiers = df["col_qualifiers"].unique()
-        for col_qualifier in unique_col_qualifiers:
-            for feature in self.features:
-                col_name = "_".join([col_qualifier, feature])
-                df[col_name] = pd.Series()
-                filt = df["col_qualifiers"] == col_qualifier
-                df.loc[filt, col_name] = df.loc[filt, feature]
-        df.drop(columns=self.features+self.qualifiers, inplace=True)
-        df.drop(columns=["col_qualifiers"], inplace=True)
-        self.wide = df.copy()
+        first, *others = self.qualifiers
+        df["col_qualifiers"] = df[first].str.cat(
+            [df[other] for other in others], sep="_")
+
+        # Pivot on a positional index so that duplicated labels
+        # (e.g. from appended tables) can't collide, then put them back.
+        index = df.index
+        df = df.reset_index(drop=True)
+        spread = []
+        for feature in self.features:
+            feature_df = df.pivot(columns="col_qualifiers", values=feature)
+            feature_df.columns = [
+                "_".join([col_qualifier, feature])
+                for col_qualifier in feature_df.columns
+            ]
+            spread.append(feature_df)
+        df = df.drop(columns=self.features+self.qualifiers+["col_qualifiers"])
+        df = pd.concat([df] + spread, axis=1)
+        df.index = index
+        self.wide = df
         return self.wide
 
 
@@ -420,16 +455,23 @@ class TableCombiner(Odm):
                     or 'shippedOnIce' in col_name:
                 df[col_name] = df[col_name].astype(np.bool)
             else:
-                df[col_name] = df[col_name].fillna("").astype(str)
+                # categorical columns only accept their own categories
+                # as fill values, so go through object first
+                df[col_name] = df[col_name].astype(object)\
+                    .fillna("").astype(str)
         return df
 
-    def remove_access(self, df: pd.DataFrame) -> pd.DataFrame:
+    def remove_access(
+        self, df: pd.DataFrame, to_drop: list = None
+    ) -> pd.DataFrame:
         """removes all columns that set access rights
 
         Parameters
         ----------
         df : pd.DataFrame
             The tabel with the access rights columns
+        to_drop : list, optional
+            Other columns to remove in the same drop
 
         Returns
         -------
@@ -439,7 +481,7 @@ class TableCombiner(Odm):
         if df.empty:
             return df
         to_remove = [col for col in df.columns if "access" in col.lower()]
-        return df.drop(columns=to_remove)
+        return df.drop(columns=to_remove + (to_drop or []))
 
     # Parsers to go from the standard ODM tables to a unified samples table
     def parse_ww_measure(self, df) -> pd.DataFrame:
@@ -457,7 +499,6 @@ class TableCombiner(Odm):
         if df.empty:
             return df
 
-        df = self.remove_access(df)
         features = ["value", "qualityFlag"]
         qualifiers = [
                 # "fractionAnalyzed",
@@ -465,15 +506,13 @@ class TableCombiner(Odm):
                 "unit",
                 "aggregation",
             ]
-        wide = TableWidener(df, features, qualifiers).widen()
-        wide.drop(columns=["index"], inplace=True)
-        wide = wide.add_prefix("WWMeasure_")
-        return wide
+        return self.widen(
+            df, features, qualifiers, "WWMeasure_", to_drop=["index"]
+        )
 
     def parse_site_measure(self, df) -> pd.DataFrame:
         if df.empty:
             return df
-        df = self.remove_access(df)
         features = ["value"]
         qualifiers = [
             "type",
@@ -487,28 +526,26 @@ class TableCombiner(Odm):
     def parse_sample(self, df) -> pd.DataFrame:
         if df.empty:
             return df
-        df_copy = df.copy(deep=True)
 
         # we want the sample to show up in any site where it is relevant.
         # Here, we gather all the siteIDs present in the siteID column for a
         # given sample, and we spread them over additional new rows so that in
-        # the end, each row of the sample table has only one siteID
-        for i, row in df_copy.iterrows():
-            # Get the value of the siteID field
-            sites = row["siteID"]
-            # Check whether there are saveral ids in the field
-            if ";" in sites:
-                # Get all the site ids in the list
-                site_ids = {x.strip() for x in sites.split(";")}
-                # Assign one id to the original row
-                df["siteID"].iloc[i] = site_ids.pop()
-                # Create new rows for each additional siteID and assign them
-                # each a siteID
-                for site_id in site_ids:
-                    new_row = df.iloc[i].copy()
-                    new_row["siteID"] = site_id
-                    df = df.append(new_row, ignore_index=True)
-        df = df.add_prefix("Sample_")
+        # the end, each row of the sample table has only one siteID.
+        # Only the siteID column is exploded; the rows are then taken by
+        # position, which avoids copying the source table beforehand.
+        site_ids = df["siteID"].str.split(";").reset_index(drop=True)
+        site_ids = site_ids.explode().str.strip()
+        # A siteID listed twice, or the empty entry left by a stray ";",
+        # doesn't add a row. Samples without any siteID keep their row.
+        is_blank = site_ids.eq("")
+        has_site = (~is_blank).groupby(level=0).transform("any")
+        site_ids = site_ids[~(is_blank & has_site)]
+        is_repeat = site_ids.reset_index().duplicated().to_numpy()
+        site_ids = site_ids[~is_repeat]
+        df = df.take(site_ids.index)
+        df.index = pd.RangeIndex(len(df))
+        df["siteID"] = site_ids.to_numpy()
+        df.columns = ["Sample_" + col for col in df.columns]
         return df
 
     def parse_site(self, df) -> pd.DataFrame:
@@ -526,14 +563,19 @@ class TableCombiner(Odm):
     def parse_cphd(self, df) -> pd.DataFrame:
         if df.empty:
             return df
-        df = self.remove_access(df)
         features = ["value"]
         qualifiers = ["type", "dateType"]
         return self.widen(df, features, qualifiers, "CPHD_")
 
-    def widen(self, df, features, qualifiers, table_name):
+    def widen(self, df, features, qualifiers, table_name, to_drop=None):
+        """Widens a table and prefixes its columns with the table name.
+        The access rights columns, and those listed in to_drop, are
+        removed in the same drop.
+        """
+        df = self.remove_access(df, to_drop)
         wide = TableWidener(df, features, qualifiers).widen()
-        wide = wide.add_prefix(table_name)
+        # widen() returns a new frame, so it can be relabelled in place
+        wide.columns = [table_name + col for col in wide.columns]
         return wide
 
     def agg_ww_measure_per_sample(self, ww: pd.DataFrame) -> pd.DataFrame:
@@ -555,8 +597,17 @@ class TableCombiner(Odm):
         """
         if ww.empty:
             return ww
-        return ww.groupby("WWMeasure_sampleID")\
+        agg = ww.groupby("WWMeasure_sampleID")\
             .agg(utilities.reduce_by_type)
+        # pandas drops the columns reduce_by_type can't handle without
+        # raising, so report them instead of losing them silently.
+        dropped = ww.columns.difference(agg.columns)\
+            .drop("WWMeasure_sampleID", errors="ignore")
+        if not dropped.empty:
+            warnings.warn(
+                "Could not aggregate WWMeasure columns per sample: "
+                f"{list(dropped)}")
+        return agg
 
     def combine_ww_measure_and_sample(
         self,
@@ -630,7 +681,6 @@ class TableCombiner(Odm):
             return df
         elif df.empty:
             return polygon
-        polygon = polygon.copy()
         polygon = polygon.add_prefix("CPHD-")
         return pd.merge(df, polygon, how="left",
                         left_on="Calculated_polygonIDForCPHD",
@@ -644,7 +694,6 @@ class TableCombiner(Odm):
             return df
         elif df.empty:
             return polygon
-        polygon = polygon.copy()
         polygon = polygon.add_prefix("Sewershed-")
         return pd.merge(df, polygon, how="left",
                         left_on="Site_polygonID",
@@ -751,17 +800,42 @@ class OdmEncoder(json.JSONEncoder):
         elif isinstance(o, pd.Timestamp):
             return {'__Timestamp__': str(o)}
         elif isinstance(o, pd.DataFrame):
+            try:
+                table = pa.Table.from_pandas(o)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # Columns mixing python types can't become Arrow arrays
+                return {
+                    '__DataFrame__':
+                    o.to_json(date_format='iso', orient='split')
+                }
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
             return {
-                '__DataFrame__':
-                o.to_json(date_format='iso', orient='split')
+                '__ArrowDataFrame__':
+                base64.b64encode(sink.getvalue().to_pybytes()).decode()
             }
         else:
             return json.JSONEncoder.default(self, o)
 
 
+SCHEMA_URL = "https://raw.githubusercontent.com/Big-Life-Lab/covid-19-wastewater/dev/src/wbe_create_table_SQLITE_en.sql"  # noqa
+
+
+def get_schema_sql():
+    """Gets the SQL script that creates the ODM tables, through the
+    local cache (see utilities.get_cached_text).
+
+    Returns
+    -------
+    str
+        The SQLite table creation script
+    """
+    return utilities.get_cached_text(SCHEMA_URL, "wbe_schema.sql")
+
+
 def create_db(filepath=None):
-    url = "https://raw.githubusercontent.com/Big-Life-Lab/covid-19-wastewater/dev/src/wbe_create_table_SQLITE_en.sql"  # noqa
-    sql = requests.get(url).text
+    sql = get_schema_sql()
     conn = None
     if filepath is None:
         filepath = "file::memory"
@@ -1,14 +1,20 @@
 from abc import ABC, abstractmethod
+from functools import lru_cache
 import pandas as pd
-import re
 from wbe_odm import utilities
 
 
 DATA_TYPES = utilities.get_data_types()
-UNKNOWN_TOKENS = [
+# (table name, lowercase variable name) to variable type
+VARIABLE_TYPES = {
+    (table_name, variable_name): dico["variableType"]
+    for table_name, variables in DATA_TYPES.items()
+    for variable_name, dico in variables.items()
+}
+UNKNOWN_TOKENS = frozenset({
     "nan",
     "na",
-    "nd"
+    "nd",
     "n.d",
     "none",
     "-",
@@ -16,7 +22,23 @@ UNKNOWN_TOKENS = [
     "n/a",
     "n/d",
     ""
-]
+})
+# Low-cardinality "category" variables stored as pandas categoricals,
+# the other "category" variables are kept as plain strings.
+CATEGORICAL_VARIABLES = frozenset({
+    "type",
+    "unit",
+    "aggregation"
+})
+TRUE_TOKENS = frozenset({
+    "true",
+    "vrai",
+    "oui",
+    "yes",
+    "1",
+    "t",
+    "y"
+})
 CONVERSION_DICT = {
     "ww_measure": {
         "odm_name": "WWMeasure",
@@ -59,46 +81,134 @@ CONVERSION_DICT = {
         "source_name": ""
         },
 }
+# ODM table name to attribute name, e.g. "WWMeasure" -> "ww_measure"
+ODM_NAME_TO_ATTR = {
+    dico["odm_name"]: attribute
+    for attribute, dico in CONVERSION_DICT.items()
+}
 
 
 def replace_unknown_by_default(string, default):
-    if re.fullmatch(utilities.UNKNOWN_REGEX, string):
+    if utilities.UNKNOWN_REGEX.fullmatch(string):
         return default
     return string
 
 
+def map_unique_strings(series, func):
+    """Applies a transformation to the distinct string values of a series
+    and broadcasts the result back to every row. ODM text columns repeat a
+    handful of values, so this saves most of the string processing.
+
+    Parameters
+    ----------
+    series : pd.Series
+        The series to transform. Values are converted to str first.
+    func : Callable[[pd.Series], pd.Series]
+        Vectorized transformation of a series of strings
+
+    Returns
+    -------
+    pd.Series
+        The transformed series, with the original index and name
+    """
+    codes, uniques = pd.factorize(series.astype(str))
+    values = func(pd.Series(uniques, dtype=object))
+    return pd.Series(
+        values.to_numpy()[codes], index=series.index, name=series.name)
+
+
+def clean_strings(values):
+    values = values.str.strip().str.lower()
+    return values.mask(values.isin(UNKNOWN_TOKENS), "")
+
+
+def clean_bools(values, default):
+    values = values.str.strip().str.lower()
+    unknown = values.isin(UNKNOWN_TOKENS)
+    return values.isin(TRUE_TOKENS).mask(unknown, default)
+
+
+@lru_cache(maxsize=None)
+def get_desired_type(table_name, variable_name):
+    return VARIABLE_TYPES.get((table_name, variable_name.lower()), "string")
+
+
 def parse_types(table_name, series):
-    variable_name = series.name.lower()
-    types = DATA_TYPES
-    lookup_table = types[table_name]
-    lookup_type = lookup_table.get(variable_name, dict())
-    desired_type = lookup_type.get("variableType", "string")
-    if desired_type == "bool":
-        series = series.astype(str)
-        default_bool = "false" if "qualityFlag" in variable_name else "true"
-        series = series.str.strip().str.lower()
-        series = series.apply(
-            lambda x: replace_unknown_by_default(x, default_bool))
-        series = series.str.replace("oui", "true", case=False)
-        series = series.str.replace("yes", "true", case=False)
-        series = series.str.startswith("true")
-        series = series.astype("bool")
-    elif desired_type in ["string", "category"]:
-        series = series.astype(str)
-        series = series.str.strip()
-        series = series.apply(lambda x: replace_unknown_by_default(x, ""))
-        if variable_name != "wkt":
-            series = series.str.lower()
-    elif desired_type == "datetime64[ns]":
-        series = series.astype(str)
-        series = series.apply(lambda x: replace_unknown_by_default(x, ""))
-        series = pd.to_datetime(series, errors="coerce")
-    elif desired_type in ["int64", "float64"]:
-        series = pd.to_numeric(series, errors="coerce")
+    desired_type = get_desired_type(table_name, series.name)
+    return cast_series(desired_type, series)
+
+
+def cast_bool(series):
+    default_bool = "qualityflag" not in series.name.lower()
+    # 0/1 flags and nullable booleans skip the string normalization
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float).fillna(default_bool).astype(bool)
+    return map_unique_strings(
+        series, lambda values: clean_bools(values, default_bool))
+
 
+def cast_string(series):
+    if series.name.lower() == "wkt":
+        # Geometries are case sensitive and nearly all distinct,
+        # so they are stripped and unknowns blanked but not lowercased.
+        series = series.fillna("").astype(str).str.strip()
+        return series.mask(series.str.lower().isin(UNKNOWN_TOKENS), "")
+    return map_unique_strings(series, clean_strings)
+
+
+def cast_category(series):
+    series = cast_string(series)
+    if series.name.lower() in CATEGORICAL_VARIABLES:
+        # Stored as integer codes, which is much lighter
+        series = series.astype("category")
     return series
 
 
+def cast_datetime(series):
+    # Dates typed by the reader (excel cells, SQL schema)
+    # don't need to go through the string parser again.
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    # Unknown tokens don't parse as dates, so coercion turns them to NaT
+    return pd.to_datetime(series.astype(str), errors="coerce")
+
+
+def cast_float(series):
+    # to_numeric infers int64 for whole numbers and for empty columns
+    return pd.to_numeric(series, errors="coerce").astype("float64")
+
+
+def cast_int(series):
+    series = pd.to_numeric(series, errors="coerce")
+    # Missing values would turn a plain int64 column into floats,
+    # the nullable integer dtype keeps them as integers.
+    if (series.dropna() % 1 == 0).all():
+        return series.astype("Int64")
+    return series.astype("float64")
+
+
+# Desired type to the function that casts a series to it
+CASTERS = {
+    "bool": cast_bool,
+    "string": cast_string,
+    "category": cast_category,
+    "datetime64[ns]": cast_datetime,
+    "float64": cast_float,
+    "int64": cast_int,
+}
+
+
+def cast_series(desired_type, series):
+    # Columns the reader already typed correctly have nothing to clean up
+    is_typed = desired_type in ("bool", "datetime64[ns]", "float64", "int64")
+    if is_typed and str(series.dtype) == desired_type:
+        return series
+    caster = CASTERS.get(desired_type)
+    if caster is None:
+        return series
+    return caster(series)
+
+
 class BaseMapper(ABC):
     sample = pd.DataFrame(
         columns=utilities.get_table_fields("Sample"))
@@ -145,16 +255,19 @@ class BaseMapper(ABC):
                 keep="first", ignore_index=True)
     
     def type_cast_table(self, odm_name, df):
-        return df.apply(
-                lambda x: parse_types(odm_name, x),
-                axis=0)
+        if df.columns.empty:
+            return df
+        columns = [
+            cast_series(get_desired_type(odm_name, name), series)
+            for name, series in df.items()
+        ]
+        return pd.concat(columns, axis=1, copy=False)
     
     def get_attribute_from_odm_name(self, odm_name):
-        for attribute, dico in self.conversion_dict.items():
-            table_name = dico["odm_name"]
-            if table_name == odm_name:
-                return attribute
-        raise NameError("Could not find attribute for table %s", odm_name)
+        if odm_name not in ODM_NAME_TO_ATTR:
+            raise NameError(
+                "Could not find attribute for table %s", odm_name)
+        return ODM_NAME_TO_ATTR[odm_name]
 
 
 def get_odm_names(attr=None):
@@ -45,10 +45,9 @@ class CsvFolderMapper(base_mapper.BaseMapper):
 
             df = self.type_cast_table(odm_name, df)
             df = df.drop_duplicates()
-            for attribute, dico in self.conversion_dict.items():
-                if dico["odm_name"] == odm_name:
-                    setattr(self, attribute, df)
-                    break
+            attribute = base_mapper.ODM_NAME_TO_ATTR.get(odm_name)
+            if attribute is not None:
+                setattr(self, attribute, df)
         self.remove_duplicates()
         return
 
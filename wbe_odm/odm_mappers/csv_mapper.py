@@ -145,11 +145,8 @@ class CsvMapper(base_mapper.BaseMapper):
         if desired_type == "bool":
             series = series.astype(str)
             series = series.str.strip().str.lower()
-            series = series.apply(
-                lambda x: base_mapper.replace_unknown_by_default(x, ""))
-            series = series.str.replace("oui", "true", case=False)\
-                .str.replace("yes", "true", case=False)\
-                .str.startswith("true")
+            # Unknown values aren't true tokens, so they come out False
+            series = series.isin(base_mapper.TRUE_TOKENS)
         elif desired_type in ["string", "category"]:
             series = series.astype(str)
             series = series.str.lower()
@@ -486,9 +483,8 @@ class CsvMapper(base_mapper.BaseMapper):
         str
             The ODM attribute name corresponding to table_name, as specified by the ODM spec.
         """
-        for attr, dico in self.conversion_dict.items():
-            if dico["odm_name"] == table_name:
-                return attr
+        if table_name in base_mapper.ODM_NAME_TO_ATTR:
+            return base_mapper.ODM_NAME_TO_ATTR[table_name]
         print(f"WARNING: Found an unrecognized ODM table name: '{table_name}'")
         return None
 
@@ -1,6 +1,94 @@
+import hashlib
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
+from wbe_odm import utilities
 from wbe_odm.odm_mappers import base_mapper
 
+CACHE_DIR = os.path.join(utilities.CACHE_DIR, "xlsx")
+
+
+def parse_sheet(filepath, sheet_name):
+    with warnings.catch_warnings():
+        warnings.filterwarnings(action="ignore")
+        return pd.read_excel(filepath, sheet_name=sheet_name)
+
+
+def read_excel_sheets(filepath, sheet_names):
+    """Reads sheets from an excel file, going through a Feather cache
+    so that an unchanged file is only parsed once. Inputs that aren't
+    local files (buffers, URLs) are read directly, without the cache.
+
+    Parameters
+    ----------
+    filepath : str, path-like or file-like
+        The excel file, anything pd.read_excel accepts
+    sheet_names : list[str]
+        Names of the sheets to read
+
+    Returns
+    -------
+    dict[str, pd.DataFrame]
+        The sheets, keyed by sheet name
+    """
+    is_file = isinstance(filepath, (str, os.PathLike)) \
+        and os.path.isfile(filepath)
+    if not is_file:
+        return parse_sheet(filepath, list(sheet_names))
+    # One cache directory per excel file, one set of sheets per version
+    cache_dir = os.path.join(
+        CACHE_DIR,
+        hashlib.md5(os.path.abspath(filepath).encode()).hexdigest())
+    version = str(os.stat(filepath).st_mtime_ns)
+    sheets = {}
+    to_parse = []
+    for sheet in sheet_names:
+        cache_path = os.path.join(cache_dir, f"{version}_{sheet}.feather")
+        try:
+            sheets[sheet] = pd.read_feather(cache_path)
+        except (OSError, ValueError):
+            to_parse.append(sheet)
+    if len(to_parse) > 1:
+        # Sheets are independent and parsing them is CPU-bound,
+        # so each one goes to its own process.
+        # os.cpu_count() returns None when the count can't be determined.
+        workers = min(len(to_parse), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = list(executor.map(
+                parse_sheet, [filepath] * len(to_parse), to_parse))
+    else:
+        parsed = [parse_sheet(filepath, sheet) for sheet in to_parse]
+    parsed = dict(zip(to_parse, parsed))
+    if parsed:
+        write_cached_sheets(cache_dir, version, parsed)
+    sheets.update(parsed)
+    return sheets
+
+
+def write_cached_sheets(cache_dir, version, sheets):
+    # Sheets cached for older versions of the file are removed. Failing
+    # to cache a sheet isn't an error, e.g. Feather can't store columns
+    # mixing numbers and text, such sheets are parsed again next time.
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        for name in os.listdir(cache_dir):
+            if not name.startswith(f"{version}_"):
+                os.remove(os.path.join(cache_dir, name))
+    except OSError:
+        return
+    for sheet, df in sheets.items():
+        cache_path = os.path.join(cache_dir, f"{version}_{sheet}.feather")
+        # Moved in place once complete, a partial file is never read
+        temp_path = cache_path + ".tmp"
+        try:
+            df.to_feather(temp_path)
+            os.replace(temp_path, cache_path)
+        except (OSError, TypeError, ValueError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
 
 class ExcelTemplateMapper(base_mapper.BaseMapper):
     def __init__(self):
@@ -31,23 +119,23 @@ class ExcelTemplateMapper(base_mapper.BaseMapper):
         sheet_names : [type], optional
             [description], by default None
         """
-        import warnings
-
         if sheet_names is None:
             sheet_names = [
                 self.conversion_dict[x]["source_name"]
                 for x in self.conversion_dict.keys()]
 
-        with warnings.catch_warnings():
-            warnings.filterwarnings(action="ignore")
-            xls = pd.read_excel(filepath, sheet_name=sheet_names)
+        xls = read_excel_sheets(filepath, sheet_names)
+        source_to_attr = {
+            names["source_name"]: attribute
+            for attribute, names in self.conversion_dict.items()
+        }
         attributes = []
         odm_names = []
         for sheet in sheet_names:
-            for attribute, names in self.conversion_dict.items():
-                if names["source_name"] == sheet:
-                    attributes.append(attribute)
-                    odm_names.append(names["odm_name"])
+            if sheet in source_to_attr:
+                attribute = source_to_attr[sheet]
+                attributes.append(attribute)
+                odm_names.append(self.conversion_dict[attribute]["odm_name"])
 
         for attribute, odm_name, sheet in zip(
             attributes,
@@ -859,10 +859,7 @@ class McGillMapper(CsvMapper):
     def __init__(self, processing_functions=MapperFuncs):
         super().__init__(processing_functions=processing_functions)
     def get_attr_from_table_name(self, table_name):
-        for attr, dico in self.conversion_dict.items():
-            odm_name = dico["odm_name"]
-            if odm_name == table_name:
-                return attr
+        return base_mapper.ODM_NAME_TO_ATTR.get(table_name)
 
     def read_static_data(self, staticdata_path):
         # Get the static data
@@ -1,5 +1,7 @@
+import base64
 import json
 import pandas as pd
+import pyarrow as pa
 from wbe_odm.odm_mappers import base_mapper
 
 
@@ -12,7 +14,7 @@ class SerializedMapper(base_mapper.BaseMapper):
         '{
             '__Odm__': {
                 'ww_measure': {
-                    '__DataFrame__': ...
+                    '__ArrowDataFrame__': ...
                 },
                 'sample': {
                     '__DataFrame__': ...
@@ -42,6 +44,10 @@ class SerializedMapper(base_mapper.BaseMapper):
                 setattr(self, key, value)
             return None
 
+        elif '__ArrowDataFrame__' in o:
+            buffer = base64.b64decode(o['__ArrowDataFrame__'])
+            return pa.ipc.open_stream(buffer).read_all().to_pandas()
+
         elif '__DataFrame__' in o:
             return pd.read_json(o['__DataFrame__'], orient='split')
 
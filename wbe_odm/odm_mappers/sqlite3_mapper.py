@@ -25,17 +25,20 @@ class SQLite3Mapper(base_mapper.BaseMapper):
                 self.conversion_dict[attribute]["odm_name"]
                 for attribute in self.conversion_dict.keys()]
 
-        attributes = []
-        for table_name in table_names:
-            for k, v in self.conversion_dict.items():
-                if v["odm_name"] == table_name:
-                    attributes.append(k)
+        attributes = [
+            base_mapper.ODM_NAME_TO_ATTR[table_name]
+            for table_name in table_names
+            if table_name in base_mapper.ODM_NAME_TO_ATTR
+        ]
 
         engine = create_engine(cnxn_str)
         for attribute, table_name in zip(
             attributes,
             table_names,
         ):
+            # Raw select rather than read_sql_table: the reflected
+            # DATE/DATETIME types raise on malformed stored values,
+            # which type_cast_table coerces to NaT instead.
             df = pd.read_sql(f"select * from {table_name}", engine)
             df = self.type_cast_table(table_name, df)
             df.drop_duplicates(keep="first", inplace=True)
@@ -1,15 +1,39 @@
+from collections import defaultdict
 import json
-from functools import reduce
+from functools import lru_cache, reduce
+import io
+import os
 import re
+import tempfile
+import time
 import warnings
 
 import numpy as np
 import pandas as pd
+import requests
 from geojson_rewind import rewind
 import shapely.wkt
 import geomet.wkt
 
-UNKNOWN_REGEX = re.compile(r"$^|n\.?[a|d|/|n]+\.?|^-$|unk.*|none", flags=re.I)
+VARIABLES_URL = "https://raw.githubusercontent.com/Big-Life-Lab/covid-19-wastewater/main/site/Variables.csv"  # noqa
+# Per-user cache for the files downloaded from the ODM repository
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME")
+    or os.path.join(os.path.expanduser("~"), ".cache"),
+    "wbe_odm")
+# Age in seconds after which a cached download is refreshed
+CACHE_MAX_AGE = 24 * 60 * 60
+# ODM variable types to the pandas dtypes they are cast to
+ODM_TYPES_TO_DTYPES = {
+    "date": "datetime64[ns]",
+    "datetime": "datetime64[ns]",
+    "boolean": "bool",
+    "float": "float64",
+    "integer": "int64",
+    "blob": "object",
+    "category": "category",
+}
+UNKNOWN_REGEX = re.compile(r"$^|n\.?[ad/n]+\.?|^-$|unk.*|none", flags=re.I)
 
 
 def hex_color_adder(color1: str, color2: str) -> str:
@@ -64,17 +88,11 @@ def has_cphd_data(x, uniques):
     return ";".join(ls) if ls else None
 
 
-def pick_cphd_poly_by_size(x, poly):
+def pick_cphd_poly_by_size(x, areas):
     if pd.isna(x):
         return None
     ls = x.split(";")
-    areas = []
-    for id_ in ls:
-        area = poly.loc[poly["Polygon_polygonID"] == id_, "area"]
-        areas.append(area)
-    min_area = min(areas)
-    min_idx = areas.index(min_area)
-    return ls[min_idx]
+    return min(ls, key=lambda id_: areas.get(id_, np.inf))
 
 
 def convert_wkt(x):
@@ -90,20 +108,20 @@ def get_polygon_for_cphd(merged, poly, cphd):
     unique_cphd_polys = cphd["CPHD_polygonID"].unique()
     merged["polys_w_cphd"] = merged["Calculated_polygonList"].apply(
         lambda x: has_cphd_data(x, unique_cphd_polys))
+    areas = dict(zip(poly["Polygon_polygonID"], poly["area"]))
     merged["Calculated_polygonIDForCPHD"] = merged["polys_w_cphd"].apply(
-        lambda x: pick_cphd_poly_by_size(x, poly))
+        lambda x: pick_cphd_poly_by_size(x, areas))
     poly.drop(columns=["shape", "area"], inplace=True)
     merged.drop(columns=["polys_w_cphd"], inplace=True)
     return merged
 
 
 def get_encompassing_polygons(row, poly):
-    poly["contains"] = poly["shape"].apply(
+    contains = poly["shape"].apply(
         lambda x: x.contains(row["temp_point"])
         if x is not None else False)
     poly_ids = poly[
-        "Polygon_polygonID"].loc[poly["contains"]].to_list()
-    poly.drop(columns=["contains"], inplace=True)
+        "Polygon_polygonID"].loc[contains].to_list()
     return ";".join(poly_ids)
 
 
@@ -219,6 +237,24 @@ def reduce_nums(x, y):
     return (x+y)/2
 
 
+def reduce_num_array(values):
+    """Vectorized equivalent of reduce(reduce_nums, values).
+
+    Each step of the pairwise reduction halves the running value, so the
+    i-th of n non-missing values ends up weighted by 1/2**(n-i), the first
+    one sharing the weight of the second.
+    """
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if n == 0:
+        return np.nan
+    if n == 1:
+        return values[0]
+    weights = 0.5 ** np.arange(n, 0, -1)
+    weights[0] = weights[1]
+    return values.dot(weights)
+
+
 def reduce_by_type(series):
     if series.empty:
         return np.nan
@@ -230,13 +266,23 @@ def reduce_by_type(series):
     if "object" in data_type:
         return reduce(reduce_text, series)
 
-    if data_type in {"float64", "int"}:
-        return reduce(reduce_nums, series)
+    if data_type == "category":
+        return reduce(reduce_text, series.astype(object))
+
+    # Plain and nullable integers are averaged as floats like float64.
+    # Booleans are numeric to pandas but aren't averaged.
+    if pd.api.types.is_numeric_dtype(series) \
+            and not pd.api.types.is_bool_dtype(series):
+        return reduce_num_array(
+            series.to_numpy(dtype="float64", na_value=np.nan))
     else:
         raise TypeError(f"could not parse series of dtype {name}")
 
 
+@lru_cache(maxsize=4096)
 def convert_wkt_to_geojson(s):
+    # The same polygons get converted on every map refresh. The cached
+    # geometry dicts are shared between callers and must not be mutated.
     if s in ["-", ""]:
         return None  # {"type":"Polygon", "coordinates":None}
     geojson_feature = json.loads(json.dumps(geomet.wkt.loads(s)))
@@ -251,27 +297,88 @@ def rank_polygons_by_desc_area(poly_df):
     return df['order']
 
 
+def get_cached_text(url, filename):
+    """Downloads a text file, keeping a local copy in CACHE_DIR. The copy
+    is used until it is older than CACHE_MAX_AGE, and as a fallback when
+    the download fails.
+
+    Parameters
+    ----------
+    url : str
+        The address of the file
+    filename : str
+        The name of the local copy
+
+    Returns
+    -------
+    str
+        The contents of the file
+    """
+    path = os.path.join(CACHE_DIR, filename)
+    is_cached = os.path.exists(path)
+    if not is_cached or time.time() - os.path.getmtime(path) > CACHE_MAX_AGE:
+        try:
+            response = requests.get(url, timeout=30)
+            response.raise_for_status()
+        except OSError:
+            if not is_cached:
+                raise
+        else:
+            write_cache_file(path, response.text)
+            return response.text
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def write_cache_file(path, text):
+    # The copy is written to a temporary file and moved in place, so a
+    # failed write can't leave a truncated copy behind. Failing to cache
+    # (e.g. read-only home directory) is not an error.
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=CACHE_DIR, suffix=".tmp",
+                delete=False) as f:
+            f.write(text)
+        os.replace(f.name, path)
+    except OSError:
+        pass
+
+
+@lru_cache(maxsize=None)
+def get_variables():
+    """Reads the ODM's Variables.csv through the local cache
+    (see get_cached_text).
+
+    The returned DataFrame is shared between callers: copy it
+    before modifying it.
+    """
+    text = get_cached_text(VARIABLES_URL, "Variables.csv")
+    return pd.read_csv(io.StringIO(text))
+
+
+@lru_cache(maxsize=None)
 def get_data_types():
-    url = "https://raw.githubusercontent.com/Big-Life-Lab/covid-19-wastewater/main/site/Variables.csv"  # noqa
-    variables = pd.read_csv(url)
+    variables = get_variables().copy()
     variables["variableName"] = variables["variableName"].str.lower()
-    variables["variableType"] = variables["variableType"]\
-        .replace(r"date(time)?", "datetime64[ns]", regex=True) \
-        .replace("boolean", "bool") \
-        .replace("float", "float64") \
-        .replace("integer", "int64") \
-        .replace("blob", "object") \
-        .replace("category", "string")
-
-    return variables\
-        .groupby("tableName")[['variableName', 'variableType']] \
-        .apply(lambda x: x.set_index('variableName').to_dict(orient='index')) \
-        .to_dict()
+    variable_types = variables["variableType"].str.lower()
+    variables["variableType"] = variable_types\
+        .map(ODM_TYPES_TO_DTYPES) \
+        .fillna(variable_types)
+
+    data_types = defaultdict(dict)
+    for table_name, variable_name, variable_type in zip(
+        variables["tableName"],
+        variables["variableName"],
+        variables["variableType"],
+    ):
+        data_types[table_name][variable_name] = {
+            "variableType": variable_type}
+    return dict(data_types)
 
 
 def get_table_fields(table_name):
-    url = "https://raw.githubusercontent.com/Big-Life-Lab/covid-19-wastewater/main/site/Variables.csv"  # noqa
-    variables = pd.read_csv(url)
+    variables = get_variables()
     return variables.loc[variables["tableName"] == table_name, "variableName"]
 
 
@@ -285,8 +392,7 @@ def clean_primary_key(key):
 
 
 def get_primary_key(table_name=None):
-    url = "https://raw.githubusercontent.com/Big-Life-Lab/covid-19-wastewater/main/site/Variables.csv"  # noqa
-    variables = pd.read_csv(url)
+    variables = get_variables()
     keys = variables.loc[
             variables["key"] == "Primary Key",
             ["tableName", "variableName"]